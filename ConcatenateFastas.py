@@ -17,7 +17,7 @@ for seq_record in SeqIO.parse("SIZ1set.fasta", "fasta"):
     newseq=seq_record.seq.replace("*", "")
     comb=SIZ1Truncated.seq+":"+newseq
     combname=SIZ1Truncated.id+"_"+seq_record.id
-    os.system(f"mkdir {combname}")
+    os.makedirs(combname, exist_ok=True)
     with open (combname + "/" + combname + ".fasta", "w") as o:
         o.write(f">{combname}\n{comb}")
 
@@ -1,47 +1,68 @@
 import os
-from Bio import SeqIO
 
 print("Starting ColabFold processing script...")
 
-# Set working directory
+# Set parent directory (all paths below are absolute, the working directory is never changed)
 parent_dir = '/global/scratch/users/enricocalvane/SIZ1/fastas'
-os.chdir(parent_dir)
-print(f"Changed to parent directory: {parent_dir}")
+print(f"Using parent directory: {parent_dir}")
 
-# Assign the name of all fasta files to a single vector
-fastas = [x for x in os.listdir() if x.startswith("AT")]
-print(f"Found {len(fastas)} directories to process: {', '.join(fastas)}")
+# When submitted as a SLURM job array (see submitarray.sh), each task folds only the pair on its
+# line of the manifest written at submission, so directories added or removed while the array
+# runs cannot shift the indices
+task_id = os.environ.get("SLURM_ARRAY_TASK_ID")
+if task_id is None:
+    # Assign the name of all fasta files to a single vector
+    with os.scandir(parent_dir) as entries:
+        fastas = sorted(e.name for e in entries if e.name.startswith("AT") and e.is_dir())
+    print(f"Found {len(fastas)} directories to process: {', '.join(fastas)}")
+else:
+    manifest = os.path.join(parent_dir, "array_pairs.txt")
+    if not os.path.exists(manifest):
+        raise SystemExit(f"ERROR: {manifest} not found; submit the array with submitarray.sh")
+    with open(manifest) as o:
+        pairs = o.read().split()
+    print(f"Read {len(pairs)} pairs from manifest: {manifest}")
+    task_max = int(os.environ["SLURM_ARRAY_TASK_MAX"])
+    if task_max < len(pairs) - 1:
+        print(f"WARNING: array ends at index {task_max} but the manifest lists {len(pairs)} pairs; "
+              f"{len(pairs) - 1 - task_max} will not be folded (submit with --array=0-{len(pairs) - 1})")
+    fastas = pairs[int(task_id):int(task_id) + 1]
+    if fastas and not os.path.isdir(os.path.join(parent_dir, fastas[0])):
+        print(f"WARNING: {fastas[0]} is listed in the manifest but no longer exists - skipping")
+        fastas = []
+    print(f"Array task {task_id}: processing {', '.join(fastas) or 'nothing'}")
 
 # IMPORTANT: for loop to reiterate the colabfold command for each file
 for i, f in enumerate(fastas, 1):
     print(f"\nProcessing directory {i}/{len(fastas)}: {f}")
-    os.chdir(f)
+    job_dir = os.path.join(parent_dir, f)
+    running_flag = os.path.join(job_dir, "colab.running")
+    done_flag = os.path.join(job_dir, "colab.done")
     
-    if "colab.running" in os.listdir():
-        print(f"Found colab.running - skipping {f} as it's currently being processed")
-        os.chdir("..")
-        continue
-        
-    if "colab.done" in os.listdir():
+    if os.path.exists(done_flag):
         print(f"Found colab.done - skipping {f} as it's already completed")
-        os.chdir("..")
         continue
 
-    outputname = f + "_output"
-    print(f"Reading fasta file: {f}.fasta")
-    seq = SeqIO.read(f + ".fasta", "fasta")
-    
-    # Create 'colab.running' file
-    with open("colab.running", "w") as o:
+    # Claim the directory by creating 'colab.running'; O_EXCL makes this fail
+    # if another worker (serial run or array task) already claimed it
+    try:
+        fd = os.open(running_flag, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    except FileExistsError:
+        print(f"Found colab.running - skipping {f} as it's currently being processed")
+        continue
+    with os.fdopen(fd, "w") as o:
         o.write("hi")
     print("Created colab.running flag file")
+
+    outputname = f + "_output"
     
-    # Run ColabFold using Apptainer
-    current_dir = os.getcwd()
+    # Run ColabFold using Apptainer; compiled JAX programs are kept in the
+    # persistent cache mount so later folds of the same size skip recompilation
     cmd = (
         f"apptainer run --nv "
         f"--bind /global/scratch/users/enricocalvane/colabfold_cache:/cache "
-        f"--bind {current_dir}:/work "
+        f"--env JAX_COMPILATION_CACHE_DIR=/cache/jax_cache "
+        f"--bind {job_dir}:/work "
         f"/global/scratch/users/enricocalvane/SIZ1/colabfold_1.5.5-cuda12.2.2.sif "
         f"colabfold_batch /work/{f}.fasta /work/{outputname} "
         f"--model-type alphafold2_multimer_v3"
@@ -52,16 +73,14 @@ for i, f in enumerate(fastas, 1):
     if result == 0:
         print("ColabFold prediction completed successfully")
         # Create 'colab.done' file
-        with open("colab.done", "w") as o:
+        with open(done_flag, "w") as o:
             o.write("bye")
         print("Created colab.done flag file")
     else:
         print(f"Error: ColabFold prediction failed with exit code {result}")
         # Remove the running flag if there was an error
-        if os.path.exists("colab.running"):
-            os.remove("colab.running")
+        if os.path.exists(running_flag):
+            os.remove(running_flag)
             print("Removed colab.running flag file due to error")
-    
-    os.chdir("..")
 
 print("\nScript completed!")
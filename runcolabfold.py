@@ -7,24 +7,51 @@ Created on Tue Jan 31 16:32:38 2023
 #SCRIPT FOR SAVIO HPC TO RUN COLABFOLD MULTIMER PREDICTIONS
 #imports
 import os
-from Bio import SeqIO
 
+#keep compiled JAX programs on scratch so later folds of the same size skip recompilation
+os.environ.setdefault("JAX_COMPILATION_CACHE_DIR", "/global/scratch/users/enricocalvane/colabfold_cache/jax_cache")
 
-os.chdir('/global/scratch/users/enricocalvane/SIZ1/fastas')
-#assign the name of all fasta files to a single vector
-fastas= [x for x in os.listdir() if x.startswith("AT")]
+parent_dir='/global/scratch/users/enricocalvane/SIZ1/fastas'
+#when submitted as a SLURM job array (see submitarray.sh) each task folds only the pair on its line of the
+#manifest written at submission, so directories added or removed while the array runs cannot shift indices
+task_id = os.environ.get("SLURM_ARRAY_TASK_ID")
+if task_id is None:
+    #assign the name of all fasta files to a single vector
+    with os.scandir(parent_dir) as entries:
+        fastas= sorted(e.name for e in entries if e.name.startswith("AT") and e.is_dir())
+else:
+    manifest = os.path.join(parent_dir, "array_pairs.txt")
+    if not os.path.exists(manifest):
+        raise SystemExit(f"ERROR: {manifest} not found; submit the array with submitarray.sh")
+    with open(manifest) as o:
+        pairs = o.read().split()
+    task_max = int(os.environ["SLURM_ARRAY_TASK_MAX"])
+    if task_max < len(pairs) - 1:
+        print(f"WARNING: array ends at index {task_max} but the manifest lists {len(pairs)} pairs; "
+              f"{len(pairs) - 1 - task_max} will not be folded (submit with --array=0-{len(pairs) - 1})")
+    fastas = pairs[int(task_id):int(task_id) + 1]
+    if fastas and not os.path.isdir(os.path.join(parent_dir, fastas[0])):
+        print(f"WARNING: {fastas[0]} is listed in the manifest but no longer exists - skipping")
+        fastas = []
 
 #IMPORTANT: for loop to reiterate the colabfold command for each file
 
 for f in fastas:
-    os.chdir(f)
-    if "colab.running" not in os.listdir() and "colab.done" not in os.listdir():        
-        outputname=f+"_output"
-        seq=SeqIO.read(f+".fasta", "fasta")
-        with open ("colab.running", "w") as o:
-            o.write("hi")
-        os.system(f"colabfold_batch {f}.fasta {outputname} --model-type alphafold2_multimer_v3")
-        with open ("colab.done", "w") as o:
-            o.write("bye")
-    os.chdir("..")
+    job_dir=os.path.join(parent_dir, f)
+    running_flag=os.path.join(job_dir, "colab.running")
+    done_flag=os.path.join(job_dir, "colab.done")
+    if os.path.exists(done_flag):
+        continue
+    #claim the directory: O_EXCL fails if another worker already created colab.running
+    try:
+        fd=os.open(running_flag, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+    except FileExistsError:
+        continue
+    with os.fdopen(fd, "w") as o:
+        o.write("hi")
+    fasta=os.path.join(job_dir, f+".fasta")
+    outputname=os.path.join(job_dir, f+"_output")
+    os.system(f"colabfold_batch {fasta} {outputname} --model-type alphafold2_multimer_v3")
+    with open (done_flag, "w") as o:
+        o.write("bye")
     
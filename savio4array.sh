@@ -0,0 +1,16 @@
+#!/bin/bash
+# Job name:
+#SBATCH --job-name=colabfold
+#SBATCH --account=fc_rnaseq
+#SBATCH --partition=savio4_gpu
+#SBATCH --nodes=1
+#SBATCH --cpus-per-task=4
+#SBATCH --qos=a5k_gpu4_normal
+#SBATCH --gres=gpu:A5000:1
+#SBATCH --time=12:00:00
+##One array task per line of array_pairs.txt. Submit through submitarray.sh, which writes that
+##manifest and overrides this range to match it; 0-366 covers the 367 AT5G60410_* pairs built by
+##ConcatenateFastas.py from SIZ1set.fasta, and the value after % is the number of GPUs to use at once
+#SBATCH --array=0-366%8
+##Command(s) to run:
+python runcolabfold.py
@@ -0,0 +1,17 @@
+#!/bin/bash
+##Freeze the list of pair directories into a manifest, then submit one array task per pair.
+##Each task reads its pair from the manifest, so directories added or removed while the
+##array runs do not shift which pair an index refers to.
+##Usage: bash submitarray.sh [max concurrent GPUs, default 8]
+PARENT_DIR=/global/scratch/users/enricocalvane/SIZ1/fastas
+MANIFEST=$PARENT_DIR/array_pairs.txt
+K=${1:-8}
+
+find "$PARENT_DIR" -mindepth 1 -maxdepth 1 -type d -name 'AT*' -printf '%f\n' | LC_ALL=C sort > "$MANIFEST"
+N=$(wc -l < "$MANIFEST")
+if [ "$N" -eq 0 ]; then
+    echo "No AT* directories found in $PARENT_DIR" >&2
+    exit 1
+fi
+echo "Wrote $N pairs to $MANIFEST"
+sbatch --array=0-$((N-1))%$K savio4array.sh
@@ -1,55 +1,55 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 
-# Create an empty DataFrame to hold the results
-results_df = pd.DataFrame(columns=["Subdirectory", "pLDDT", "iPTM", "pTM"])
+# orjson parses the ColabFold score files several times faster; fall back to the stdlib if it is missing
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Columns of the metrics sheet
+columns = ["Subdirectory", "pLDDT", "iPTM", "pTM"]
 
 # Set the path to the parent directory
 parent_dir = "/global/scratch/users/enricocalvane/SIZ1/fastas"
-os.chdir(parent_dir)
-
-# Loop over all subdirectories
-for subdirectory in os.listdir(parent_dir):
-    subdirectory_path = os.path.join(parent_dir, subdirectory)
-    if not os.path.isdir(subdirectory_path):
-        continue
-
-    # Loop over all output directories in the subdirectory
-    for output_dir in os.listdir(subdirectory_path):
-        if not output_dir.endswith("_output"):
-            continue
-        output_dir_path = os.path.join(subdirectory_path, output_dir)
-        if not os.path.isdir(output_dir_path):
-            continue
-
-        # Change directory to output directory
-        os.chdir(output_dir_path)
-
-        # Get the name of the top-ranked model json file
-        json_file = [f for f in os.listdir(output_dir_path) if "rank_001" in f and f.endswith(".json")]
-        if not json_file:
-            continue
-
-        json_file = json_file[0]
-
-        with open(json_file) as f:
-            data = json.load(f)
-
-        predicted_lddt = data['plddt']
-        avglddt = sum(predicted_lddt) / len(predicted_lddt)
-        predicted_tm_score = data['ptm']
-        predicted_iptm_score = data['iptm']
-
-        # Use pd.concat() correctly
-        new_row = pd.DataFrame({
-            "Subdirectory": [output_dir_path], 
-            "pLDDT": [avglddt], 
-            "iPTM": [predicted_iptm_score], 
-            "pTM": [predicted_tm_score]
-        })
-        results_df = pd.concat([results_df, new_row], ignore_index=True)
+
+
+def summarize_output(output_dir_path):
+    """Return the metrics row for one output directory, or None if it has no top-ranked model."""
+    # Get the top-ranked model json file
+    with os.scandir(output_dir_path) as entries:
+        json_file = [e.path for e in entries if "rank_001" in e.name and e.name.endswith(".json")]
+    if not json_file:
+        return None
+
+    with open(json_file[0], "rb") as f:
+        data = json_loads(f.read())
+
+    predicted_lddt = data['plddt']
+    avglddt = float(np.mean(predicted_lddt))
+    predicted_tm_score = data['ptm']
+    predicted_iptm_score = data['iptm']
+
+    return {"Subdirectory": output_dir_path, "pLDDT": avglddt, "iPTM": predicted_iptm_score, "pTM": predicted_tm_score}
+
+
+# Loop over all subdirectories (scandir reuses the cached entry type, no extra stat per entry)
+with os.scandir(parent_dir) as entries:
+    subdirectory_paths = [e.path for e in entries if e.is_dir()]
+
+# Collect all output directories in the subdirectories
+output_dir_paths = []
+for subdirectory_path in subdirectory_paths:
+    with os.scandir(subdirectory_path) as entries:
+        output_dir_paths.extend(e.path for e in entries if e.name.endswith("_output") and e.is_dir())
+
+# Reading the score files is I/O bound, so summarize the output directories on a thread pool;
+# this collects one row per output directory and the DataFrame is built once below
+with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+    rows = [row for row in executor.map(summarize_output, output_dir_paths) if row is not None]
 
 # Write the results DataFrame to an Excel file
-os.chdir(parent_dir)
-results_df.to_excel("Metrics.xlsx", index=False)
+results_df = pd.DataFrame(rows, columns=columns)
+results_df.to_excel(os.path.join(parent_dir, "Metrics.xlsx"), index=False)